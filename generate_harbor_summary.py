@@ -11,26 +11,88 @@ from __future__ import annotations
 
 import argparse
 import getpass
+import hashlib
 import json
+import re
 import sys
-from dataclasses import dataclass
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import lru_cache
 from html import escape
+from itertools import chain
+from operator import attrgetter
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Set, TextIO, Tuple
 from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+try:
+    import ijson
+except ImportError:  # Optional: stream-parse API pages when available.
+    ijson = None
+
+try:
+    import requests_cache
+except ImportError:  # Optional: required only for `--cache`.
+    requests_cache = None
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # Optional: faster decoding of buffered API pages.
+    from json import loads as json_loads
 
 # Harbor returns RFC3339 timestamps with a trailing "Z".
 ISO_Z_SUFFIX = "Z"
+# `datetime.fromisoformat` only understands the "Z" suffix from Python 3.11 onwards.
+FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
 # Use stdlib timezone.utc for compatibility with Python 3.8+.
 UTC = timezone.utc
 
+# Placeholder for missing values; it needs no HTML or Markdown escaping.
+MISSING_VALUE = "—"
+
+# Characters that would break Markdown table cells, escaped in a single `str.translate` pass.
+MARKDOWN_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", "|": "\\|", "`": "\\`", "\n": "<br />"})
+
 # Default filenames when the user does not specify `--output`.
 DEFAULT_HTML_OUTPUT_FILENAME = "harbor_summary.html"
 DEFAULT_MARKDOWN_OUTPUT_FILENAME = "harbor_summary.md"
 
+# Default cap on requests awaiting a Harbor response at once (`--jobs`).
+DEFAULT_JOBS = 8
+
+# Pooled connections per job; leaves room for every concurrent fetch plus its
+# next-page prefetch so workers reuse keep-alive connections instead of opening new ones.
+HTTP_POOL_CONNECTIONS_PER_JOB = 2
+# Retry transient Harbor/proxy failures on idempotent GETs with exponential backoff.
+HTTP_RETRY_TOTAL = 5
+HTTP_RETRY_BACKOFF_FACTOR = 0.3
+HTTP_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# On-disk response cache used with `--cache` (stored as harbor_cache.sqlite in the
+# working directory); entries expire after five minutes unless Harbor's cache headers say otherwise.
+HTTP_CACHE_NAME = "harbor_cache"
+HTTP_CACHE_EXPIRE_SECONDS = 300
+
+# Harbor releases without (or users not authorized for) the global repository
+# listing answer with these statuses; collect_data then lists each project instead.
+GLOBAL_REPOSITORIES_FALLBACK_STATUS_CODES = (403, 404)
+
+# Request large pages to minimise round-trips; Harbor releases with a lower cap
+# reject the request with a 400/422 naming `page_size`, and we retry smaller.
+DEFAULT_PAGE_SIZE = 500
+PAGE_SIZE_REJECTION_STATUS_CODES = (400, 422)
+PAGE_SIZE_LIMIT_PATTERN = re.compile(r"page_size.*?(?:less than or equal to|<=)\s*(\d+)", re.IGNORECASE | re.DOTALL)
+# Page sizes negotiated per Harbor base URL, so each endpoint only pays for the fallback once.
+_PAGE_SIZE_LIMITS: Dict[str, int] = {}
+
 
 @dataclass
 class RepositorySummary:
@@ -40,6 +102,10 @@ class RepositorySummary:
     artifact_count: Optional[int]
     update_time: Optional[str]
     description: Optional[str]
+    sort_key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.sort_key = self.name.lower()
 
 
 @dataclass
@@ -47,6 +113,10 @@ class ProjectSummary:
     name: str
     repo_count: int
     repositories: List[RepositorySummary]
+    sort_key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.sort_key = self.name.lower()
 
 
 @dataclass(frozen=True)
@@ -65,14 +135,16 @@ def _render_repository_html(repo: RepositorySummary) -> str:
 
 def _render_artifacts_html(repo: RepositorySummary) -> str:
     """Render artifact count for HTML output, using an em dash when missing."""
-    value = "—" if repo.artifact_count is None else str(repo.artifact_count)
-    return escape(value)
+    if repo.artifact_count is None:
+        return MISSING_VALUE
+    return escape(str(repo.artifact_count))
 
 
 def _render_pull_count_html(repo: RepositorySummary) -> str:
     """Render pull count for HTML output, using an em dash when missing."""
-    value = "—" if repo.pull_count is None else str(repo.pull_count)
-    return escape(value)
+    if repo.pull_count is None:
+        return MISSING_VALUE
+    return escape(str(repo.pull_count))
 
 
 def _render_last_updated_html(repo: RepositorySummary) -> str:
@@ -84,7 +156,7 @@ def _render_description_html(repo: RepositorySummary) -> str:
     """Render repository description for HTML output."""
     description = repo.description.strip() if isinstance(repo.description, str) else repo.description
     if not description:
-        description = "—"
+        return MISSING_VALUE
     return escape(description)
 
 
@@ -95,14 +167,16 @@ def _render_repository_markdown(repo: RepositorySummary) -> str:
 
 def _render_artifacts_markdown(repo: RepositorySummary) -> str:
     """Render artifact count for Markdown output."""
-    value = "—" if repo.artifact_count is None else str(repo.artifact_count)
-    return _escape_markdown(value)
+    if repo.artifact_count is None:
+        return MISSING_VALUE
+    return _escape_markdown(str(repo.artifact_count))
 
 
 def _render_pull_count_markdown(repo: RepositorySummary) -> str:
     """Render pull count for Markdown output."""
-    value = "—" if repo.pull_count is None else str(repo.pull_count)
-    return _escape_markdown(value)
+    if repo.pull_count is None:
+        return MISSING_VALUE
+    return _escape_markdown(str(repo.pull_count))
 
 
 def _render_last_updated_markdown(repo: RepositorySummary) -> str:
@@ -114,9 +188,13 @@ def _render_description_markdown(repo: RepositorySummary) -> str:
     """Render repository description for Markdown output."""
     description = repo.description.strip() if isinstance(repo.description, str) else repo.description
     if not description:
-        description = "—"
-    return _escape_markdown(description)
+        return MISSING_VALUE
+    # Coerce before the cached escape: Harbor may hand back non-string (unhashable) values.
+    return _escape_markdown(str(description))
+
 
+# Case-insensitive ordering shared by projects and repositories in the rendered summaries.
+SORT_KEY = attrgetter("sort_key")
 
 # Registry describing every column we can show in the summary tables.
 COLUMN_DEFINITIONS: Tuple[ColumnDefinition, ...] = (
@@ -159,6 +237,9 @@ COLUMN_DEFINITIONS: Tuple[ColumnDefinition, ...] = (
 
 COLUMN_REGISTRY: Dict[str, ColumnDefinition] = {column.key: column for column in COLUMN_DEFINITIONS}
 
+# A selected column reduced to its label and the renderer for the chosen output format.
+RenderedColumn = Tuple[str, Callable[[RepositorySummary], str]]
+
 
 def parse_args() -> argparse.Namespace:
     """Parse command-line arguments for the summary generator."""
@@ -216,8 +297,12 @@ def parse_args() -> argparse.Namespace:
         "-s",
         "--page-size",
         type=int,
-        default=100,
-        help="Number of items to fetch per API page when listing projects and repositories.",
+        default=DEFAULT_PAGE_SIZE,
+        help=(
+            "Number of items to fetch per API page when listing projects and repositories. "
+            "Harbor accepts up to 500 on recent releases; older releases that reject the "
+            "requested size are retried with a smaller one."
+        ),
     )
     parser.add_argument(
         "-T",
@@ -226,6 +311,16 @@ def parse_args() -> argparse.Namespace:
         default=30.0,
         help="HTTP timeout in seconds for API calls.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=(
+            "Maximum number of requests awaiting a Harbor response at once (and number of "
+            "project workers); response bodies may still be streaming beyond this limit."
+        ),
+    )
     parser.add_argument(
         "-P",
         "--project",
@@ -256,8 +351,26 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="List Harbor projects (with repository counts) and exit.",
     )
+    parser.add_argument(
+        "--cache",
+        dest="cache",
+        action="store_true",
+        default=False,
+        help=(
+            "Cache Harbor API responses on disk (requires requests-cache) so repeated runs "
+            "reuse unchanged responses instead of re-querying Harbor."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help="Always query Harbor directly without the on-disk response cache (default).",
+    )
 
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1.")
     args.explicit_output = args.output is not None
     if args.output is None:
         args.output = DEFAULT_HTML_OUTPUT_FILENAME
@@ -276,9 +389,25 @@ def ensure_credentials(args: argparse.Namespace) -> None:
 
 def build_session(args: argparse.Namespace) -> requests.Session:
     """Create a configured `requests.Session` for interacting with Harbor."""
-    session = requests.Session()
+    session = _build_cached_session(args) if getattr(args, "cache", False) else requests.Session()
     session.verify = not args.insecure
-    session.headers.update({"Accept": "application/json"})
+    session.headers.update({"Accept": "application/json", "Connection": "keep-alive"})
+    retry = Retry(
+        total=HTTP_RETRY_TOTAL,
+        backoff_factor=HTTP_RETRY_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET"]),
+        # Hand the final response back so `raise_for_status` reports Harbor's error body.
+        raise_on_status=False,
+    )
+    pool_size = HTTP_POOL_CONNECTIONS_PER_JOB * getattr(args, "jobs", DEFAULT_JOBS)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     if args.api_token:
         session.headers["Authorization"] = f"Bearer {args.api_token}"
     else:
@@ -286,6 +415,27 @@ def build_session(args: argparse.Namespace) -> requests.Session:
     return session
 
 
+def _build_cached_session(args: argparse.Namespace) -> requests.Session:
+    """Create a `requests_cache.CachedSession` whose entries are scoped to the Harbor URL and credentials."""
+    if requests_cache is None:
+        raise SystemExit("Error: --cache requires requests-cache (pip install requests-cache).")
+    # requests-cache drops Authorization from its keys by default; fold a digest of the
+    # credentials back in so different Harbor users never share cached responses.
+    credentials = args.api_token if args.api_token else f"{args.username}:{args.password}"
+    identity = hashlib.sha256(f"{args.base_url}\0{credentials}".encode("utf-8")).hexdigest()[:16]
+
+    def create_key(request: requests.PreparedRequest, **kwargs: Any) -> str:
+        return f"{identity}-{requests_cache.create_key(request, **kwargs)}"
+
+    return requests_cache.CachedSession(
+        HTTP_CACHE_NAME,
+        backend="sqlite",
+        expire_after=HTTP_CACHE_EXPIRE_SECONDS,
+        cache_control=True,
+        key_fn=create_key,
+    )
+
+
 def fetch_paginated(
     session: requests.Session,
     base_url: str,
@@ -295,185 +445,410 @@ def fetch_paginated(
     extra_headers: Optional[Dict[str, str]] = None,
     params: Optional[Mapping[str, Any]] = None,
     timeout: float,
+    limiter: Optional[threading.Semaphore] = None,
 ) -> Iterable[Dict[str, Any]]:
-    """Yield dictionaries from a paginated Harbor API endpoint."""
-    page = 1
-    while True:
+    """Yield dictionaries from a paginated Harbor API endpoint.
+
+    When Harbor reports (via `X-Total-Count`, or a full buffered page) that more
+    pages follow, the request for the next page is issued in the background so its
+    network latency overlaps with consumption of the current page. Pages are
+    stream-parsed when `ijson` is installed. When `limiter` is given, each request
+    holds it until Harbor responds, bounding concurrency across callers.
+    """
+    url = urljoin(base_url, path)
+    page_size = min(page_size, _PAGE_SIZE_LIMITS.get(base_url, page_size))
+
+    def request_page(page: int) -> requests.Response:
         query: Dict[str, Any] = {"page": page, "page_size": page_size}
         if params:
             query.update(params)
-        response = session.get(
-            urljoin(base_url, path),
-            params=query,
-            headers=extra_headers,
-            timeout=timeout,
-        )
-        response.raise_for_status()
-        data = response.json()
+        with limiter if limiter is not None else nullcontext():
+            return session.get(
+                url,
+                params=query,
+                headers=extra_headers,
+                timeout=timeout,
+                stream=ijson is not None,
+            )
+
+    page = 1
+    next_page: Optional["Future[requests.Response]"] = None
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        try:
+            response = request_page(page)
+            while True:
+                if page == 1 and page_size > 1 and _is_page_size_rejection(response):
+                    page_size = _smaller_page_size(response, page_size)
+                    _PAGE_SIZE_LIMITS[base_url] = page_size
+                    response = request_page(page)
+                    continue
+                response.raise_for_status()
+                total = _safe_int(response.headers.get("X-Total-Count"))
+                items = _read_page_items(response, path)
+                if _expects_next_page(total, items, page=page, page_size=page_size):
+                    next_page = prefetcher.submit(request_page, page + 1)
+                count = 0
+                for item in items:
+                    count += 1
+                    if not isinstance(item, dict):
+                        continue
+                    yield item
+                if page == 1 and total is not None and 0 < count < min(page_size, total):
+                    # Harbor silently served fewer items than requested; adopt its page size so
+                    # later offsets line up, and drop any prefetch made at the old size.
+                    page_size = count
+                    _PAGE_SIZE_LIMITS[base_url] = page_size
+                    if next_page is not None:
+                        _discard_prefetched_page(next_page)
+                        next_page = None
+                elif count < page_size or (total is not None and page * page_size >= total):
+                    break
+                page += 1
+                if next_page is not None:
+                    response = next_page.result()
+                    next_page = None
+                else:
+                    response = request_page(page)
+        finally:
+            if next_page is not None:
+                _discard_prefetched_page(next_page)
+
+
+def _discard_prefetched_page(next_page: "Future[requests.Response]") -> None:
+    """Release the connection held by a prefetched page that will not be consumed."""
+    try:
+        next_page.result().close()
+    except requests.RequestException:
+        pass
+
+
+def _read_page_items(response: requests.Response, path: str) -> Iterable[Any]:
+    """Return the items of a Harbor list response, streaming them when `ijson` is available."""
+    # requests-cache reads (and decodes) every body itself, fresh or replayed, leaving
+    # nothing for ijson to stream, so decode those responses whole.
+    if ijson is None or hasattr(response, "from_cache"):
+        try:
+            data = json_loads(response.content)
+        except ValueError as exc:
+            # Match `response.json()`, whose decode errors are `RequestException`s.
+            raise requests.exceptions.InvalidJSONError(
+                f"Unexpected response for {path}: {exc}", response=response
+            ) from exc
         if not isinstance(data, list):
             raise ValueError(
                 f"Unexpected response for {path}: {json.dumps(data, indent=2)[:200]}..."
             )
-        if not data:
-            break
-        for item in data:
-            if not isinstance(item, dict):
-                continue
-            yield item
-        if len(data) < page_size:
-            break
-        page += 1
+        return data
+    return _stream_page_items(response, path)
+
+
+def _stream_page_items(response: requests.Response, path: str) -> Iterator[Any]:
+    """Incrementally decode a JSON array body so items are yielded as they arrive."""
+    # Let urllib3 undo any gzip/deflate transfer encoding before ijson sees the bytes.
+    response.raw.decode_content = True
+    try:
+        events = ijson.parse(response.raw)
+        first = next(events, None)
+        if first is None or first[1] != "start_array":
+            raise ValueError(f"Unexpected response for {path}: expected a JSON array.")
+        yield from ijson.items(chain([first], events), "item")
+    # Reading `response.raw` bypasses requests' own wrapping of body errors, so map them
+    # the way `Response.iter_content` would for `main` to report them cleanly.
+    except ProtocolError as exc:
+        raise requests.exceptions.ChunkedEncodingError(exc) from exc
+    except DecodeError as exc:
+        raise requests.exceptions.ContentDecodingError(exc) from exc
+    except ReadTimeoutError as exc:
+        raise requests.exceptions.ConnectionError(exc) from exc
+    except ijson.JSONError as exc:
+        raise requests.exceptions.InvalidJSONError(
+            f"Unexpected response for {path}: {exc}", response=response
+        ) from exc
+
+
+def _expects_next_page(
+    total: Optional[int],
+    items: Iterable[Any],
+    *,
+    page: int,
+    page_size: int,
+) -> bool:
+    """Return True when another page is known to follow before `items` is consumed."""
+    if total is not None:
+        return page * page_size < total
+    # Without a total, only a fully buffered page tells us up front that it is full.
+    return isinstance(items, list) and len(items) >= page_size
 
 
+def _is_page_size_rejection(response: requests.Response) -> bool:
+    """Return True when Harbor rejected a request because `page_size` was too large."""
+    return response.status_code in PAGE_SIZE_REJECTION_STATUS_CODES and "page_size" in response.text
+
+
+def _smaller_page_size(response: requests.Response, page_size: int) -> int:
+    """Pick a page size Harbor should accept, using its reported limit when present."""
+    match = PAGE_SIZE_LIMIT_PATTERN.search(response.text)
+    if match:
+        limit = int(match.group(1))
+        if 0 < limit < page_size:
+            return limit
+    return max(1, page_size // 2)
+
+
+@lru_cache(maxsize=8192)
 def format_timestamp(value: Optional[str]) -> str:
     """Convert an ISO timestamp to a human-readable UTC string."""
     if not value:
-        return "—"
+        return MISSING_VALUE
     try:
-        cleaned = value.replace(ISO_Z_SUFFIX, "+00:00") if value.endswith(ISO_Z_SUFFIX) else value
+        cleaned = value
+        if not FROMISOFORMAT_ACCEPTS_Z and value[-1] == ISO_Z_SUFFIX:
+            cleaned = value[:-1] + "+00:00"
         dt = datetime.fromisoformat(cleaned)
         return dt.strftime("%Y-%m-%d %H:%M UTC")
     except ValueError:
         return value
 
 
-def build_html(projects: List[ProjectSummary], columns: List[ColumnDefinition]) -> str:
-    """Render the collected project data as an HTML document."""
+def build_html(projects: List[ProjectSummary], columns: List[RenderedColumn], out: TextIO) -> None:
+    """Write the collected project data (already sorted by `collect_data`) to `out` as an HTML document."""
     total_projects = len(projects)
     total_repositories = sum(len(project.repositories) for project in projects)
     timestamp = datetime.now(UTC).strftime("%Y-%m-%d %H:%M UTC")
 
-    rows: List[str] = [
-        "<!DOCTYPE html>",
-        "<html lang='en'>",
-        "<head>",
-        "<meta charset='utf-8' />",
-        "<title>Harbor Repository Summary</title>",
-        "<style>",
-        "body { font-family: Arial, sans-serif; margin: 2rem; background: #f9fafc; color: #172b4d; }",
-        "h1 { margin-bottom: 0.25rem; }",
-        "section { margin-top: 2rem; }",
-        "table { border-collapse: collapse; width: 100%; margin-top: 1rem; }",
-        "th, td { border: 1px solid #dfe1e6; padding: 0.5rem 0.75rem; text-align: left; }",
-        "th { background-color: #f4f5f7; }",
-        "tbody tr:nth-child(even) { background-color: #f8f9fc; }",
-        "code { background: #f4f5f7; padding: 0.125rem 0.25rem; border-radius: 4px; }",
-        "footer { margin-top: 4rem; font-size: 0.875rem; color: #6b778c; }",
-        "</style>",
-        "</head>",
-        "<body>",
-        "<h1>Harbor Repository Summary</h1>",
-        f"<p>Generated at {escape(timestamp)} · {total_projects} projects · {total_repositories} repositories.</p>",
-    ]
+    out.write(
+        "<!DOCTYPE html>\n"
+        "<html lang='en'>\n"
+        "<head>\n"
+        "<meta charset='utf-8' />\n"
+        "<title>Harbor Repository Summary</title>\n"
+        "<style>\n"
+        "body { font-family: Arial, sans-serif; margin: 2rem; background: #f9fafc; color: #172b4d; }\n"
+        "h1 { margin-bottom: 0.25rem; }\n"
+        "section { margin-top: 2rem; }\n"
+        "table { border-collapse: collapse; width: 100%; margin-top: 1rem; }\n"
+        "th, td { border: 1px solid #dfe1e6; padding: 0.5rem 0.75rem; text-align: left; }\n"
+        "th { background-color: #f4f5f7; }\n"
+        "tbody tr:nth-child(even) { background-color: #f8f9fc; }\n"
+        "code { background: #f4f5f7; padding: 0.125rem 0.25rem; border-radius: 4px; }\n"
+        "footer { margin-top: 4rem; font-size: 0.875rem; color: #6b778c; }\n"
+        "</style>\n"
+        "</head>\n"
+        "<body>\n"
+        "<h1>Harbor Repository Summary</h1>\n"
+    )
+    out.write(
+        f"<p>Generated at {escape(timestamp)} · {total_projects} projects · {total_repositories} repositories.</p>\n"
+    )
 
-    for project in sorted(projects, key=lambda p: p.name.lower()):
-        rows.append("<section>")
-        rows.append(f"<h2>Project: {escape(project.name)} ({project.repo_count} repositories)</h2>")
+    header_cells = "".join(f"<th>{escape(label)}</th>" for label, _ in columns)
+    renderers = tuple(render for _, render in columns)
+    for project in projects:
+        out.write("<section>\n")
+        out.write(f"<h2>Project: {escape(project.name)} ({project.repo_count} repositories)</h2>\n")
         if not project.repositories:
-            rows.append("<p>No repositories available.</p>")
+            out.write("<p>No repositories available.</p>\n")
         else:
-            rows.append("<table>")
-            header_cells = "".join(f"<th>{escape(column.label)}</th>" for column in columns)
-            rows.append(f"<thead><tr>{header_cells}</tr></thead>")
-            rows.append("<tbody>")
-            for repo in sorted(project.repositories, key=lambda r: r.name.lower()):
-                cell_html = "".join(f"<td>{column.html_renderer(repo)}</td>" for column in columns)
-                rows.append(f"<tr>{cell_html}</tr>")
-            rows.append("</tbody>")
-            rows.append("</table>")
-        rows.append("</section>")
-
-    rows.extend(
-        [
-            "<footer>",
-            "<p>Generated by generate_harbor_summary.py.</p>",
-            "</footer>",
-            "</body>",
-            "</html>",
-        ]
+            out.write("<table>\n")
+            out.write(f"<thead><tr>{header_cells}</tr></thead>\n")
+            out.write("<tbody>\n")
+            for repo in project.repositories:
+                out.write("<tr><td>" + "</td><td>".join([render(repo) for render in renderers]) + "</td></tr>\n")
+            out.write("</tbody>\n")
+            out.write("</table>\n")
+        out.write("</section>\n")
+
+    out.write(
+        "<footer>\n"
+        "<p>Generated by generate_harbor_summary.py.</p>\n"
+        "</footer>\n"
+        "</body>\n"
+        "</html>\n"
     )
-    return "\n".join(rows)
 
 
-def build_markdown(projects: List[ProjectSummary], columns: List[ColumnDefinition]) -> str:
-    """Render the collected project data as a Markdown document."""
+def build_markdown(projects: List[ProjectSummary], columns: List[RenderedColumn], out: TextIO) -> None:
+    """Write the collected project data (already sorted by `collect_data`) to `out` as a Markdown document."""
     total_projects = len(projects)
     total_repositories = sum(len(project.repositories) for project in projects)
     timestamp = datetime.now(UTC).strftime("%Y-%m-%d %H:%M UTC")
 
-    lines: List[str] = [
-        "# Harbor Repository Summary",
-        "",
-        f"Generated at {timestamp} · {total_projects} projects · {total_repositories} repositories.",
-        "",
-    ]
+    out.write("# Harbor Repository Summary\n\n")
+    out.write(f"Generated at {timestamp} · {total_projects} projects · {total_repositories} repositories.\n\n")
 
-    for project in sorted(projects, key=lambda p: p.name.lower()):
-        lines.append(f"## Project: {_escape_markdown(project.name)} ({project.repo_count} repositories)")
-        lines.append("")
+    header = " | ".join(_escape_markdown(label) for label, _ in columns)
+    separator = " | ".join("---" for _ in columns)
+    renderers = tuple(render for _, render in columns)
+    for project in projects:
+        out.write(f"## Project: {_escape_markdown(project.name)} ({project.repo_count} repositories)\n\n")
         if not project.repositories:
-            lines.append("_No repositories available._")
-            lines.append("")
+            out.write("_No repositories available._\n\n")
             continue
-        header = " | ".join(_escape_markdown(column.label) for column in columns)
-        separator = " | ".join("---" for _ in columns)
-        lines.append(f"| {header} |")
-        lines.append(f"| {separator} |")
-        for repo in sorted(project.repositories, key=lambda r: r.name.lower()):
-            row = " | ".join(column.markdown_renderer(repo) for column in columns)
-            lines.append(f"| {row} |")
-        lines.append("")
+        out.write(f"| {header} |\n")
+        out.write(f"| {separator} |\n")
+        for repo in project.repositories:
+            out.write("| " + " | ".join([render(repo) for render in renderers]) + " |\n")
+        out.write("\n")
+
+    out.write("_Generated by generate_harbor_summary.py_\n")
+
+
+def _repository_summary(repo: Mapping[str, Any], project_name: str) -> RepositorySummary:
+    """Convert a Harbor repository payload into a `RepositorySummary`."""
+    return RepositorySummary(
+        name=str(repo.get("name", "")),
+        project_name=project_name,
+        pull_count=_safe_int(repo.get("pull_count")),
+        artifact_count=_safe_int(repo.get("artifact_count")),
+        update_time=repo.get("update_time"),
+        description=repo.get("description"),
+    )
+
+
+def _fetch_project_repositories(
+    session: requests.Session,
+    args: argparse.Namespace,
+    project_name: str,
+    limiter: Optional[threading.Semaphore] = None,
+) -> List[RepositorySummary]:
+    """Fetch every repository belonging to `project_name`."""
+    repositories = [
+        _repository_summary(repo, project_name)
+        for repo in fetch_paginated(
+            session,
+            args.base_url,
+            f"/api/v2.0/projects/{project_name}/repositories",
+            page_size=args.page_size,
+            timeout=args.timeout,
+            extra_headers={"X-Is-Resource-Name": "true"},
+            limiter=limiter,
+        )
+    ]
+    repositories.sort(key=SORT_KEY)
+    return repositories
 
-    lines.append("_Generated by generate_harbor_summary.py_")
-    lines.append("")
-    return "\n".join(lines)
+
+def _fetch_all_repositories(
+    session: requests.Session,
+    args: argparse.Namespace,
+    limiter: Optional[threading.Semaphore] = None,
+) -> Optional[Dict[str, List[RepositorySummary]]]:
+    """Fetch every repository in one walk of the global listing, grouped by project name.
+
+    Returns `None` when the Harbor instance does not offer (or authorize) the global
+    endpoint, so callers can fall back to per-project listings.
+    """
+    grouped: Dict[str, List[RepositorySummary]] = {}
+    try:
+        for repo in fetch_paginated(
+            session,
+            args.base_url,
+            "/api/v2.0/repositories",
+            page_size=args.page_size,
+            timeout=args.timeout,
+            limiter=limiter,
+        ):
+            name = str(repo.get("name", ""))
+            project_name = name.split("/", 1)[0]
+            grouped.setdefault(project_name, []).append(_repository_summary(repo, project_name))
+    except requests.HTTPError as exc:
+        if grouped or exc.response is None:
+            raise
+        if exc.response.status_code not in GLOBAL_REPOSITORIES_FALLBACK_STATUS_CODES:
+            raise
+        return None
+    for repositories in grouped.values():
+        repositories.sort(key=SORT_KEY)
+    return grouped
+
+
+def _fetch_repositories_per_project(
+    session: requests.Session,
+    args: argparse.Namespace,
+    listed: List[Tuple[str, Optional[int]]],
+    limiter: Optional[threading.Semaphore] = None,
+) -> List[ProjectSummary]:
+    """Fetch each listed project's repositories through its own endpoint, in parallel."""
+    projects: List[ProjectSummary] = []
+    selected: List[Tuple[str, int]] = []
+    for name, reported_count in listed:
+        if reported_count == 0:
+            # Harbor already reports the project as empty; skip the repository listing.
+            projects.append(ProjectSummary(name=name, repo_count=0, repositories=[]))
+            continue
+        selected.append((name, reported_count or 0))
+
+    # Each project's repository listing is independent I/O, so fetch them in parallel.
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(
+            executor.map(
+                lambda item: _fetch_project_repositories(session, args, item[0], limiter),
+                selected,
+            )
+        )
+    projects.extend(
+        ProjectSummary(name=name, repo_count=repo_count, repositories=repositories)
+        for (name, repo_count), repositories in zip(selected, results)
+    )
+    return projects
 
 
 def collect_data(args: argparse.Namespace) -> List[ProjectSummary]:
-    """Fetch projects and repositories from Harbor, applying any filters."""
+    """Fetch projects and repositories from Harbor, applying any filters.
+
+    Without project filters, repositories come from a single walk of Harbor's global
+    repository listing, and any project it returns fewer repositories for than the
+    project list reports is listed individually; with filters (or on Harbor releases
+    lacking that endpoint), each selected project is listed individually. Projects and their repositories are
+    returned sorted case-insensitively by name, ready for rendering.
+    """
     ensure_credentials(args)
     session = build_session(args)
     timeout = args.timeout
-    projects: List[ProjectSummary] = []
     project_filters, filter_lookup = _prepare_project_filters(getattr(args, "projects", None))
-    remaining_filters = set(project_filters) if project_filters else set()
+    remaining_filters = set(project_filters or ())
+    # Caps in-flight requests across the project workers and their page prefetches.
+    limiter = threading.BoundedSemaphore(args.jobs)
 
+    listed: List[Tuple[str, Optional[int]]] = []
     for project in fetch_paginated(
         session,
         args.base_url,
         "/api/v2.0/projects",
         page_size=args.page_size,
         timeout=timeout,
+        limiter=limiter,
     ):
         name = str(project.get("name", ""))
         if not name:
             continue
-        normalized_name = name.lower()
-        if project_filters and normalized_name not in project_filters:
-            # Skip projects outside the requested subset.
-            continue
-        remaining_filters.discard(normalized_name)
-        repo_count = int(project.get("repo_count", 0) or 0)
-        repositories: List[RepositorySummary] = []
-        for repo in fetch_paginated(
-            session,
-            args.base_url,
-            f"/api/v2.0/projects/{name}/repositories",
-            page_size=args.page_size,
-            timeout=timeout,
-            extra_headers={"X-Is-Resource-Name": "true"},
-        ):
-            repositories.append(
-                RepositorySummary(
-                    name=str(repo.get("name", "")),
-                    project_name=name,
-                    pull_count=_safe_int(repo.get("pull_count")),
-                    artifact_count=_safe_int(repo.get("artifact_count")),
-                    update_time=repo.get("update_time"),
-                    description=repo.get("description"),
-                )
+        if project_filters is not None:
+            normalized_name = name.casefold()
+            if normalized_name not in project_filters:
+                # Skip projects outside the requested subset.
+                continue
+            remaining_filters.discard(normalized_name)
+        listed.append((name, _safe_int(project.get("repo_count"))))
+
+    grouped = _fetch_all_repositories(session, args, limiter) if project_filters is None else None
+    if grouped is not None:
+        projects = []
+        incomplete: List[Tuple[str, Optional[int]]] = []
+        for name, reported_count in listed:
+            repositories = grouped.get(name, [])
+            if reported_count is not None and len(repositories) < reported_count:
+                # The global listing is authorized differently from /projects (robot accounts,
+                # for instance, only see public projects there), so list this one directly.
+                incomplete.append((name, reported_count))
+                continue
+            projects.append(
+                ProjectSummary(name=name, repo_count=reported_count or 0, repositories=repositories)
             )
-        projects.append(ProjectSummary(name=name, repo_count=repo_count, repositories=repositories))
+        if incomplete:
+            projects.extend(_fetch_repositories_per_project(session, args, incomplete, limiter))
+    else:
+        projects = _fetch_repositories_per_project(session, args, listed, limiter)
+    projects.sort(key=SORT_KEY)
 
     if remaining_filters:
         missing = ", ".join(sorted(filter_lookup[key] for key in remaining_filters))
@@ -492,18 +867,25 @@ def _safe_int(value: Any) -> Optional[int]:
         return None
 
 
-def _escape_markdown(value: Any) -> str:
+@lru_cache(maxsize=4096)
+def _escape_markdown(value: str) -> str:
     """Escape characters that would break Markdown table formatting."""
-    text = str(value)
-    text = text.replace("\\", "\\\\")
-    text = text.replace("|", "\\|")
-    text = text.replace("`", "\\`")
-    text = text.replace("\n", "<br />")
-    return text
+    return value.translate(MARKDOWN_ESCAPE_TABLE)
 
 
 def _prepare_columns(
     raw_columns: Optional[List[str]],
+    output_format: str,
+) -> List[RenderedColumn]:
+    """Resolve the requested columns into `(label, renderer)` pairs for `output_format`."""
+    definitions = _resolve_column_definitions(raw_columns)
+    if output_format == "markdown":
+        return [(column.label, column.markdown_renderer) for column in definitions]
+    return [(column.label, column.html_renderer) for column in definitions]
+
+
+def _resolve_column_definitions(
+    raw_columns: Optional[List[str]],
 ) -> List[ColumnDefinition]:
     """Resolve the requested columns into `ColumnDefinition` objects."""
     if not raw_columns:
@@ -543,8 +925,12 @@ def _print_available_columns() -> None:
 
 def _prepare_project_filters(
     raw_filters: Optional[List[str]],
-) -> Tuple[Optional[Set[str]], Dict[str, str]]:
-    """Normalize requested project filters for consistent comparisons."""
+) -> Tuple[Optional[FrozenSet[str]], Dict[str, str]]:
+    """Normalize requested project filters for consistent comparisons.
+
+    Returns `None` instead of an empty set when no filters apply, so callers can
+    skip normalizing project names altogether.
+    """
     if not raw_filters:
         return None, {}
     mapping: Dict[str, str] = {}
@@ -555,10 +941,10 @@ def _prepare_project_filters(
             cleaned = token.strip()
             if not cleaned:
                 continue
-            mapping[cleaned.lower()] = cleaned
+            mapping[cleaned.casefold()] = cleaned
     if not mapping:
         return None, {}
-    return set(mapping.keys()), mapping
+    return frozenset(mapping), mapping
 
 
 def _list_projects(args: argparse.Namespace) -> None:
@@ -566,7 +952,7 @@ def _list_projects(args: argparse.Namespace) -> None:
     ensure_credentials(args)
     session = build_session(args)
     project_filters, filter_lookup = _prepare_project_filters(getattr(args, "projects", None))
-    remaining_filters = set(project_filters) if project_filters else set()
+    remaining_filters = set(project_filters or ())
 
     projects: List[Tuple[str, int]] = []
     for project in fetch_paginated(
@@ -579,10 +965,11 @@ def _list_projects(args: argparse.Namespace) -> None:
         name = str(project.get("name", ""))
         if not name:
             continue
-        normalized_name = name.lower()
-        if project_filters and normalized_name not in project_filters:
-            continue
-        remaining_filters.discard(normalized_name)
+        if project_filters is not None:
+            normalized_name = name.casefold()
+            if normalized_name not in project_filters:
+                continue
+            remaining_filters.discard(normalized_name)
         repo_count = int(project.get("repo_count", 0) or 0)
         projects.append((name, repo_count))
 
@@ -629,7 +1016,7 @@ def main() -> None:
             if output_format == "markdown"
             else DEFAULT_HTML_OUTPUT_FILENAME
         )
-    columns = _prepare_columns(getattr(args, "columns", None))
+    columns = _prepare_columns(getattr(args, "columns", None), output_format)
     try:
         projects = collect_data(args)
     except requests.HTTPError as exc:
@@ -640,13 +1027,14 @@ def main() -> None:
         raise SystemExit(f"Network error while contacting Harbor: {exc}") from exc
 
     if output_format == "markdown":
-        summary = build_markdown(projects, columns)
+        builder = build_markdown
         label = "Markdown"
     else:
-        summary = build_html(projects, columns)
+        builder = build_html
         label = "HTML"
     output_path = Path(args.output)
-    output_path.write_text(summary, encoding="utf-8")
+    with output_path.open("w", encoding="utf-8") as out:
+        builder(projects, columns, out)
     print(f"Wrote {label} summary to {output_path.resolve()}")
 
 